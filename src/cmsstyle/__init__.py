@@ -1 +1,24 @@
 from .cmsstyle import *
+from . import cmsstyle as _cmsstyle
+
+# Names resolved on first access, so ROOT is only imported when it is needed:
+# the kLimit* colours are created in ROOT and rt is the ROOT module.
+_LAZY_NAMES = ('rt',) + tuple(_cmsstyle._LIMIT_COLORS)
+
+del rt  # Provided by __getattr__ so the ROOT module itself is returned, not the stand-in
+
+__all__ = [name for name in globals() if not name.startswith('_')] + list(_LAZY_NAMES)
+
+def __getattr__(name):
+    """Package attributes resolved on first access (and then kept in the package)."""
+    if name == 'rt':
+        import ROOT  # Asked for explicitly (or by a star import), so ROOT itself is given
+        value = globals()[name] = ROOT
+        return value
+    if name in _cmsstyle._LIMIT_COLORS:
+        value = globals()[name] = getattr(_cmsstyle, name)
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
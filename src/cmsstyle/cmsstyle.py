@@ -9,11 +9,25 @@
 The cmsstyle library provides a pyROOT-based implementation of the figure
 guidelines of the CMS Collaboration.
 """
-import ROOT as rt
 from array import array
 
 import re
 
+class _LazyROOT(object):
+    """Stand-in for the ROOT module, so ROOT is only imported (and initialized)
+    when it is first needed rather than when importing cmsstyle.
+
+    On the first attribute access the module-level name rt is rebound to the
+    ROOT module itself, so later accesses go directly to ROOT.
+    """
+    def __getattr__(self, name):
+        global rt
+        import ROOT
+        rt = ROOT
+        return getattr(ROOT, name)
+
+rt = _LazyROOT()
+
 # This global variables for the module should not be accessed directy! Use the utilities below.
 cms_lumi = "Run 2, 138 fb^{#minus1}"
 cms_energy = "13 TeV"
@@ -52,12 +66,21 @@ petroff_10 = ["#3f90da", "#ffa90e", "#bd1f01", "#94a4a2", "#832db6", "#a96b59",
 # This should be consider CONSTANT! (i.e. do not modify them)
 # --------------------------------
 
-# Plots for limits and statistical bands
-kLimit68 = rt.TColor.GetColor("#607641")  # Internal band, default set
-kLimit95 = rt.TColor.GetColor("#F5BB54")    # External band, default set
-
-kLimit68cms = rt.TColor.GetColor("#85D1FBff")  # Internal band, CMS-logo set
-kLimit95cms = rt.TColor.GetColor("#FFDF7Fff")  # External band, CMS-logo set
+# Plots for limits and statistical bands. The ROOT colours are created when
+# first accessed (see __getattr__ below) as kLimit68, kLimit95, etc.
+_LIMIT_COLORS = {
+    'kLimit68': "#607641",  # Internal band, default set
+    'kLimit95': "#F5BB54",  # External band, default set
+    'kLimit68cms': "#85D1FBff",  # Internal band, CMS-logo set
+    'kLimit95cms': "#FFDF7Fff",  # External band, CMS-logo set
+}
+
+def __getattr__(name):
+    """Module attributes resolved on first access (to avoid using ROOT when importing)."""
+    if name in _LIMIT_COLORS:
+        value = globals()[name] = rt.TColor.GetColor(_LIMIT_COLORS[name])
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 def SetEnergy (energy, unit = "TeV"):
@@ -83,8 +106,7 @@ def SetLumi (lumi, unit="fb", round_lumi=False):
     """
     global cms_lumi
     if lumi != "":
-        cms_lumi = "{:.0f}".format(lumi) if round_lumi else "{}".format(lumi)
-        cms_lumi += " {unit}^{{#minus1}}".format(unit=unit)
+        cms_lumi = (f"{lumi:.0f}" if round_lumi else f"{lumi}") + f" {unit}^{{#minus1}}"
     else:
         cms_lumi = lumi
 
@@ -163,7 +185,38 @@ def SetCmsTextSize(size):
     cmsTextSize = size
 
 # # # #
-class p6:
+class _PetroffColors(type):
+    """Metaclass for the Petroff colour schemes: the ROOT colour of each
+    attribute is resolved the first time it is accessed and then stored in the
+    class.
+
+    Each class defines _colors, mapping the attribute name to the name of the
+    colour in ROOT (if ROOT may define it) and its hexadecimal code. The colours
+    are listed by dir() and documented in the docstring of each class. As they
+    need ROOT, an AttributeError is raised (and hasattr() is False) if ROOT
+    cannot be imported.
+    """
+    def __getattr__(cls, name):
+        try:
+            rootname, hexcode = cls.__dict__['_colors'][name]
+        except KeyError:
+            raise AttributeError("type object {!r} has no attribute {!r}".format(cls.__name__, name))
+
+        # ROOT may have defined the colors, otherwise we define them by hand.
+        try:
+            value = getattr(rt, rootname, None) if rootname is not None else None
+            if value is None:
+                value = _get_color(hexcode)  # Shared with the colours used by cmsDrawStack
+        except ImportError as exc:
+            raise AttributeError("{}.{} needs ROOT, that could not be imported".format(cls.__name__, name)) from exc
+
+        setattr(cls, name, value)
+        return value
+
+    def __dir__(cls):
+        return sorted(set(super().__dir__()) | set(cls.__dict__['_colors']))
+
+class p6(metaclass=_PetroffColors):
     """
     A class to represent the Petroff color scheme with 6 colors.
 
@@ -175,28 +228,20 @@ class p6:
     kGray (int): The color gray.
     kViolet (int): The color violet.
     """
-    # ROOT may have defined the colors:
-    try:
-        kBlue = rt.kP6Blue
-        kYellow = rt.kP6Yellow
-        kRed = rt.kP6Red
-        kGrape = rt.kP6Grape
-        kGray = rt.kP6Gray
-        if (rt.GetColor(rt.kP6Violet).GetTitle=='#7a21dd'):  # There was a bug in the first implementation in ROOT
-                                                             # (I think no "released" version is affected. 6.34.00 is already OK)
-            kViolet = rt.kP6Violet
-        else:
-            kViolet = rt.TColor.GetColor("#7a21dd")
-    except: # Defining the color scheme by hand
-        kBlue = rt.TColor.GetColor("#5790fc")
-        kYellow = rt.TColor.GetColor("#f89c20")
-        kRed = rt.TColor.GetColor("#e42536")
-        kGrape = rt.TColor.GetColor("#964a8b")
-        kGray = rt.TColor.GetColor("#9c9ca1")
-        kViolet = rt.TColor.GetColor("#7a21dd")
+    _colors = {
+        'kBlue': ('kP6Blue', "#5790fc"),
+        'kYellow': ('kP6Yellow', "#f89c20"),
+        'kRed': ('kP6Red', "#e42536"),
+        'kGrape': ('kP6Grape', "#964a8b"),
+        'kGray': ('kP6Gray', "#9c9ca1"),
+        # There was a bug in the first implementation of kP6Violet in ROOT
+        # (I think no "released" version is affected. 6.34.00 is already OK).
+        # Using the code, GetColor returns kP6Violet if it has the right value.
+        'kViolet': (None, "#7a21dd"),
+    }
 
 # # # #
-class p8:
+class p8(metaclass=_PetroffColors):
     """
     A class to represent the Petroff color scheme with 8 colors.
 
@@ -210,27 +255,18 @@ class p8:
     kAzure (int): The color azure.
     kGray (int): The color gray.
     """
-    # ROOT may have defined the colors:
-    try:
-        kBlue = rt.kP8Blue
-        kOrange = rt.kP8Orange
-        kRed = rt.kP8Red
-        kPink = rt.kP8Pink
-        kGreen = rt.kP8Green
-        kCyan = rt.kP8Cyan
-        kAzure = rt.kP8Azure
-        kGray = rt.kP8Gray
-    except: # Defining the color scheme by hand
-        kBlue = rt.TColor.GetColor("#1845fb")
-        kOrange = rt.TColor.GetColor("#ff5e02")
-        kRed = rt.TColor.GetColor("#c91f16")
-        kPink = rt.TColor.GetColor("#c849a9")
-        kGreen = rt.TColor.GetColor("#adad7d")
-        kCyan = rt.TColor.GetColor("#86c8dd")
-        kAzure = rt.TColor.GetColor("#578dff")
-        kGray = rt.TColor.GetColor("#656364")
-
-class p10:
+    _colors = {
+        'kBlue': ('kP8Blue', "#1845fb"),
+        'kOrange': ('kP8Orange', "#ff5e02"),
+        'kRed': ('kP8Red', "#c91f16"),
+        'kPink': ('kP8Pink', "#c849a9"),
+        'kGreen': ('kP8Green', "#adad7d"),
+        'kCyan': ('kP8Cyan', "#86c8dd"),
+        'kAzure': ('kP8Azure', "#578dff"),
+        'kGray': ('kP8Gray', "#656364"),
+    }
+
+class p10(metaclass=_PetroffColors):
     """
     A class to represent the Petroff color scheme with 10 colors.
 
@@ -244,54 +280,58 @@ class p10:
     kOrange (int): The color orange.
     kGreen (int): The color green.
     """
-    # ROOT may have defined the colors:
-    try:
-        kBlue = rt.kP10Blue
-        kYellow = rt.kP10Yellow
-        kRed = rt.kP10Red
-        kGray = rt.kP10Gray
-        kViolet = rt.kP10Violet
-        kBrown = rt.kP10Brown
-        kOrange = rt.kP10Orange
-        kGreen = rt.kP10Green
-        kAsh = rt.kP10Ash
-        kCyan = rt.kP10Cyan
-    except:
-        kBlue = rt.TColor.GetColor("#3f90da")
-        kYellow = rt.TColor.GetColor("#ffa90e")
-        kRed = rt.TColor.GetColor("#bd1f01")
-        kGray = rt.TColor.GetColor("#94a4a2")
-        kViolet = rt.TColor.GetColor("#832db6")
-        kBrown = rt.TColor.GetColor("#a96b59")
-        kOrange = rt.TColor.GetColor("#e76300")
-        kGreen = rt.TColor.GetColor("#b9ac70")
-        kAsh = rt.TColor.GetColor("#717581")
-        kCyan = rt.TColor.GetColor("#92dadd")
+    _colors = {
+        'kBlue': ('kP10Blue', "#3f90da"),
+        'kYellow': ('kP10Yellow', "#ffa90e"),
+        'kRed': ('kP10Red', "#bd1f01"),
+        'kGray': ('kP10Gray', "#94a4a2"),
+        'kViolet': ('kP10Violet', "#832db6"),
+        'kBrown': ('kP10Brown', "#a96b59"),
+        'kOrange': ('kP10Orange', "#e76300"),
+        'kGreen': ('kP10Green', "#b9ac70"),
+        'kAsh': ('kP10Ash', "#717581"),
+        'kCyan': ('kP10Cyan', "#92dadd"),
+    }
 
 
+# Gradient definition (stops and RGB values) for the alternative 2D palette
+_PALETTE_LEN = array("d", (0.00, 0.15, 0.70, 1.00))
+_PALETTE_RED = array("d", (0.00, 0.00, 1.00, 0.70))
+_PALETTE_GREEN = array("d", (0.30, 0.50, 0.70, 0.00))
+_PALETTE_BLUE = array("d", (0.50, 0.40, 0.20, 0.15))
+
+_ALT_PALETTE_CACHE = {}  # Colour indices of the alternative palette already created for each alpha
+
 def CreateAlternativePalette(alpha=1):
     """
     Create an alternative color palette for 2D histograms.
 
+    The colours are only created once for each alpha value, and reused if
+    the palette is requested again.
+
     Args:
         alpha (float, optional): The transparency value for the palette colors. Defaults to 1 (opaque).
     """
-    red_values = array("d", [0.00, 0.00, 1.00, 0.70])
-    green_values = array("d", [0.30, 0.50, 0.70, 0.00])
-    blue_values = array("d", [0.50, 0.40, 0.20, 0.15])
-    length_values = array("d", [0.00, 0.15, 0.70, 1.00])
+    global usingPalette2D
+
+    palette = _ALT_PALETTE_CACHE.get(alpha)
+    if palette is not None:
+        # CreateGradientColorTable also sets the palette in gStyle, so we do the same.
+        rt.gStyle.SetPalette(len(palette), palette)
+        usingPalette2D = palette
+        return
+
     num_colors = 200
     color_table = rt.TColor.CreateGradientColorTable(
-        len(length_values),
-        length_values,
-        red_values,
-        green_values,
-        blue_values,
+        len(_PALETTE_LEN),
+        _PALETTE_LEN,
+        _PALETTE_RED,
+        _PALETTE_GREEN,
+        _PALETTE_BLUE,
         num_colors,
         alpha,
     )
-    global usingPalette2D
-    usingPalette2D = [color_table + i for i in range(num_colors)]
+    usingPalette2D = _ALT_PALETTE_CACHE[alpha] = array("i", range(color_table, color_table + num_colors))
 
 # # # #
 def SetAlternative2DColor(hist=None, style=None, alpha=1):
@@ -304,14 +344,17 @@ def SetAlternative2DColor(hist=None, style=None, alpha=1):
         alpha (float, optional): The transparency value for the palette colours. Defaults to 1 (opaque).
     """
     global usingPalette2D
-    if usingPalette2D is None:
+    palette = _ALT_PALETTE_CACHE.get(alpha)
+    if palette is None:  # The colours are created only once for each alpha
         CreateAlternativePalette(alpha=alpha)
+    else:
+        usingPalette2D = palette
     if style is None:  # Using the cmsStyle or, if not set the current style.
         global cmsStyle
-        if cmStyle is not None: style = cmsStyle
+        if cmsStyle is not None: style = cmsStyle
         else: style = rt.gStyle
 
-    style.SetPalette(len(usingPalette2D), array("i", usingPalette2D))
+    style.SetPalette(len(usingPalette2D), usingPalette2D)
 
     if hist is not None:
         hist.SetContour(len(usingPalette2D))
@@ -335,8 +378,15 @@ def GetPalette(hist):
     Returns:
         ROOT.TPaletteAxis: The colour palette object.
     """
+    # The palette is kept in the histogram after the first search. ROOT deletes
+    # it with the other functions of the histogram (e.g. in TH1::Reset), so it
+    # is only reused while it is still attached to the histogram.
+    palette = getattr(hist, '_cmsstyle_palette', None)
+    if palette and hist.GetListOfFunctions().Contains(palette): return palette
+
     UpdatePad()  # Must update the pad to access the palette
     palette = hist.GetListOfFunctions().FindObject("palette")
+    if palette: hist._cmsstyle_palette = palette
     return palette
 
 # # # #
@@ -355,29 +405,29 @@ def UpdatePalettePosition(
         isNDC (bool, optional): Whether the provided coordinates are in NDC (True) or absolute coordinates (False). Defaults to True.
     """
     palette = GetPalette(hist)
-    if canv != None:
-        hframe = GetcmsCanvasHist(canv)
-        X1 = 1 - canv.GetRightMargin() * 0.95
-        X2 = 1 - canv.GetRightMargin() * 0.70
+    if canv is not None:
+        rmargin = canv.GetRightMargin()
+        X1 = 1 - rmargin * 0.95
+        X2 = 1 - rmargin * 0.70
         Y1 = canv.GetBottomMargin()
         Y2 = 1 - canv.GetTopMargin()
     if isNDC:
-        if X1 != None:
+        if X1 is not None:
             palette.SetX1NDC(X1)
-        if X2 != None:
+        if X2 is not None:
             palette.SetX2NDC(X2)
-        if Y1 != None:
+        if Y1 is not None:
             palette.SetY1NDC(Y1)
-        if Y2 != None:
+        if Y2 is not None:
             palette.SetY2NDC(Y2)
     else:
-        if X1 != None:
+        if X1 is not None:
             palette.SetX1(X1)
-        if X2 != None:
+        if X2 is not None:
             palette.SetX2(X2)
-        if Y1 != None:
+        if Y1 is not None:
             palette.SetY1(Y1)
-        if Y2 != None:
+        if Y2 is not None:
             palette.SetY2(Y2)
 
 
@@ -417,115 +467,144 @@ def UpdatePad(pad=None):
         rt.gPad.Update()
 
 # # # #
-def setCMSStyle(force=rt.kTRUE):
-    """This method allows to define the CMSStyle defaults.
+_VERSION_SEP_RE = re.compile(r'[./]')
+_ROOT_VERSION = None  # Major.minor ROOT version as a float (e.g. 6.32), set on first use
 
-    Args:
-        force (ROOT boolean): boolean passed to the application of the Style in ROOT to force to objects loaded after setting the style.
+def _root_version():
+    """Returns the ROOT version as a float with the major and minor numbers (e.g. 6.32).
+
+    The version is parsed only once, as it cannot change within a session.
     """
-    global cmsStyle
-    if cmsStyle != None:
-        del cmsStyle
-    cmsStyle = rt.TStyle("cmsStyle", "Style for P-CMS")
-    rt.gROOT.SetStyle(cmsStyle.GetName())
-    rt.gROOT.ForceStyle(force)
+    global _ROOT_VERSION
+    if _ROOT_VERSION is None:
+        _ROOT_VERSION = float('.'.join(_VERSION_SEP_RE.split(rt.__version__)[0:2]))
+    return _ROOT_VERSION
+
+# # # #
+# Settings applied by setCMSStyle, as (TStyle setter, arguments) pairs.
+_STYLE_CONFIG = (
     # for the canvas:
-    cmsStyle.SetCanvasBorderMode(0)
-    cmsStyle.SetCanvasColor(rt.kWhite)
-    cmsStyle.SetCanvasDefH(600)  # Height of canvas
-    cmsStyle.SetCanvasDefW(600)  # Width of canvas
-    cmsStyle.SetCanvasDefX(0)  # Position on screen
-    cmsStyle.SetCanvasDefY(0)
-    cmsStyle.SetPadBorderMode(0)
-    cmsStyle.SetPadColor(rt.kWhite)
-    cmsStyle.SetPadGridX(False)
-    cmsStyle.SetPadGridY(False)
-    cmsStyle.SetGridColor(0)
-    cmsStyle.SetGridStyle(3)
-    cmsStyle.SetGridWidth(1)
+    ("SetCanvasBorderMode", (0,)),
+    ("SetCanvasColor", (0,)),  # rt.kWhite
+    ("SetCanvasDefH", (600,)),  # Height of canvas
+    ("SetCanvasDefW", (600,)),  # Width of canvas
+    ("SetCanvasDefX", (0,)),  # Position on screen
+    ("SetCanvasDefY", (0,)),
+    ("SetPadBorderMode", (0,)),
+    ("SetPadColor", (0,)),  # rt.kWhite
+    ("SetPadGridX", (False,)),
+    ("SetPadGridY", (False,)),
+    ("SetGridColor", (0,)),
+    ("SetGridStyle", (3,)),
+    ("SetGridWidth", (1,)),
     # For the frame:
-    cmsStyle.SetFrameBorderMode(0)
-    cmsStyle.SetFrameBorderSize(1)
-    cmsStyle.SetFrameFillColor(0)
-    cmsStyle.SetFrameFillStyle(0)
-    cmsStyle.SetFrameLineColor(1)
-    cmsStyle.SetFrameLineStyle(1)
-    cmsStyle.SetFrameLineWidth(1)
+    ("SetFrameBorderMode", (0,)),
+    ("SetFrameBorderSize", (1,)),
+    ("SetFrameFillColor", (0,)),
+    ("SetFrameFillStyle", (0,)),
+    ("SetFrameLineColor", (1,)),
+    ("SetFrameLineStyle", (1,)),
+    ("SetFrameLineWidth", (1,)),
     # For the histo:
-    cmsStyle.SetHistLineColor(1)
-    cmsStyle.SetHistLineStyle(0)
-    cmsStyle.SetHistLineWidth(1)
-    cmsStyle.SetEndErrorSize(2)
-    cmsStyle.SetMarkerStyle(20)
-    cmsStyle.SetMarkerSize(1) # Not actually set by the TDR Style, but useful to fix default!
+    ("SetHistLineColor", (1,)),
+    ("SetHistLineStyle", (0,)),
+    ("SetHistLineWidth", (1,)),
+    ("SetEndErrorSize", (2,)),
+    ("SetMarkerStyle", (20,)),
+    ("SetMarkerSize", (1,)),  # Not actually set by the TDR Style, but useful to fix default!
     # For the fit/function:
-    cmsStyle.SetOptFit(1)
-    cmsStyle.SetFitFormat("5.4g")
-    cmsStyle.SetFuncColor(2)
-    cmsStyle.SetFuncStyle(1)
-    cmsStyle.SetFuncWidth(1)
+    ("SetOptFit", (1,)),
+    ("SetFitFormat", ("5.4g",)),
+    ("SetFuncColor", (2,)),
+    ("SetFuncStyle", (1,)),
+    ("SetFuncWidth", (1,)),
     # For the date:
-    cmsStyle.SetOptDate(0)
+    ("SetOptDate", (0,)),
     # For the TLegend (added by O. Gonzalez, in case people do not/cannot use cmsLeg)
-    cmsStyle.SetLegendTextSize(0.04)
-    cmsStyle.SetLegendFont(42)
+    ("SetLegendTextSize", (0.04,)),
+    ("SetLegendFont", (42,)),
 # Not avaiable    cmsStyle.SetLegendTextColor(rt.kBlack)
 # Not available for now   cmsStyle.SetLegendFillStyle(0)
-    cmsStyle.SetLegendBorderSize(0)
-    cmsStyle.SetLegendFillColor(0)
+    ("SetLegendBorderSize", (0,)),
+    ("SetLegendFillColor", (0,)),
     # For the statistics box:
-    cmsStyle.SetOptFile(0)
-    cmsStyle.SetOptStat(0)  # To display the mean and RMS:   SetOptStat('mr')
-    cmsStyle.SetStatColor(rt.kWhite)
-    cmsStyle.SetStatFont(42)
-    cmsStyle.SetStatFontSize(0.025)
-    cmsStyle.SetStatTextColor(1)
-    cmsStyle.SetStatFormat("6.4g")
-    cmsStyle.SetStatBorderSize(1)
-    cmsStyle.SetStatH(0.1)
-    cmsStyle.SetStatW(0.15)
+    ("SetOptFile", (0,)),
+    ("SetOptStat", (0,)),  # To display the mean and RMS:   SetOptStat('mr')
+    ("SetStatColor", (0,)),  # rt.kWhite
+    ("SetStatFont", (42,)),
+    ("SetStatFontSize", (0.025,)),
+    ("SetStatTextColor", (1,)),
+    ("SetStatFormat", ("6.4g",)),
+    ("SetStatBorderSize", (1,)),
+    ("SetStatH", (0.1,)),
+    ("SetStatW", (0.15,)),
     # Margins:
-    cmsStyle.SetPadTopMargin(0.05)
-    cmsStyle.SetPadBottomMargin(0.13)
-    cmsStyle.SetPadLeftMargin(0.16)
-    cmsStyle.SetPadRightMargin(0.02)
+    ("SetPadTopMargin", (0.05,)),
+    ("SetPadBottomMargin", (0.13,)),
+    ("SetPadLeftMargin", (0.16,)),
+    ("SetPadRightMargin", (0.02,)),
     # For the Global title:
-    cmsStyle.SetOptTitle(0)
-    cmsStyle.SetTitleFont(42)
-    cmsStyle.SetTitleColor(1)
-    cmsStyle.SetTitleTextColor(1)
-    cmsStyle.SetTitleFillColor(10)
-    cmsStyle.SetTitleFontSize(0.05)
+    ("SetOptTitle", (0,)),
+    ("SetTitleFont", (42,)),
+    ("SetTitleColor", (1,)),
+    ("SetTitleTextColor", (1,)),
+    ("SetTitleFillColor", (10,)),
+    ("SetTitleFontSize", (0.05,)),
     # For the axis titles:
-    cmsStyle.SetTitleColor(1, "XYZ")
-    cmsStyle.SetTitleFont(42, "XYZ")
-    cmsStyle.SetTitleSize(0.06, "XYZ")
-    cmsStyle.SetTitleXOffset(0.9)
-    cmsStyle.SetTitleYOffset(1.25)
+    ("SetTitleColor", (1, "XYZ")),
+    ("SetTitleFont", (42, "XYZ")),
+    ("SetTitleSize", (0.06, "XYZ")),
+    ("SetTitleXOffset", (0.9,)),
+    ("SetTitleYOffset", (1.25,)),
     # For the axis labels:
-    cmsStyle.SetLabelColor(1, "XYZ")
-    cmsStyle.SetLabelFont(42, "XYZ")
-    cmsStyle.SetLabelOffset(0.012, "XYZ")
-    cmsStyle.SetLabelSize(0.05, "XYZ")
+    ("SetLabelColor", (1, "XYZ")),
+    ("SetLabelFont", (42, "XYZ")),
+    ("SetLabelOffset", (0.012, "XYZ")),
+    ("SetLabelSize", (0.05, "XYZ")),
     # For the axis:
-    cmsStyle.SetAxisColor(1, "XYZ")
-    cmsStyle.SetStripDecimals(True)
-    cmsStyle.SetTickLength(0.03, "XYZ")
-    cmsStyle.SetNdivisions(510, "XYZ")
-    cmsStyle.SetPadTickX(1)  # To get tick marks on the opposite side of the frame
-    cmsStyle.SetPadTickY(1)
+    ("SetAxisColor", (1, "XYZ")),
+    ("SetStripDecimals", (True,)),
+    ("SetTickLength", (0.03, "XYZ")),
+    ("SetNdivisions", (510, "XYZ")),
+    ("SetPadTickX", (1,)),  # To get tick marks on the opposite side of the frame
+    ("SetPadTickY", (1,)),
     # Change for log plots:
-    cmsStyle.SetOptLogx(0)
-    cmsStyle.SetOptLogy(0)
-    cmsStyle.SetOptLogz(0)
+    ("SetOptLogx", (0,)),
+    ("SetOptLogy", (0,)),
+    ("SetOptLogz", (0,)),
     # Postscript options:
-    cmsStyle.SetPaperSize(20.0, 20.0)
-    cmsStyle.SetHatchesLineWidth(5)
-    cmsStyle.SetHatchesSpacing(0.05)
+    ("SetPaperSize", (20.0, 20.0)),
+    ("SetHatchesLineWidth", (5,)),
+    ("SetHatchesSpacing", (0.05,)),
+)
+
+def setCMSStyle(force=True, rebuild=False):
+    """This method allows to define the CMSStyle defaults.
+
+    The style is only built the first time. Later calls just make it the
+    current style again, unless a rebuild is requested.
+
+    Args:
+        force (ROOT boolean): boolean passed to the application of the Style in ROOT to force to objects loaded after setting the style.
+        rebuild (bool, optional): Whether to recreate the style from scratch even if it was already defined. Defaults to False.
+    """
+    global cmsStyle
+    if cmsStyle is not None:
+        if not rebuild:
+            rt.gROOT.SetStyle(cmsStyle.GetName())
+            rt.gROOT.ForceStyle(force)
+            cmsStyle.cd()
+            return
+        del cmsStyle
+    cmsStyle = rt.TStyle("cmsStyle", "Style for P-CMS")
+    rt.gROOT.SetStyle(cmsStyle.GetName())
+    rt.gROOT.ForceStyle(force)
+    for name, args in _STYLE_CONFIG:
+        getattr(cmsStyle, name)(*args)
 
     # Some additional parameters we need to set as "style"
 
-    if (float('.'.join(re.split('\.|/',rt.__version__)[0:2])) >= 6.32):  # Not available before!
+    if _root_version() >= 6.32:  # Not available before!
         # This change by O. Gonzalez allows to save inside the canvas the
         # informnation about the defined colours.
         rt.TColor.DefinedColors(1)
@@ -548,6 +627,19 @@ def getCMSStyle ():
 # ##    ## ##     ## ##    ##      ##       ##     ## ##     ##  ##
 #  ######  ##     ##  ######       ########  #######  ##     ## ####
 
+# Horizontal position of the CMS text inside the frame, as a fraction of the
+# frame width, for each alignment (iPosX % 10): left, centered or right.
+_CMS_TEXT_RELPOSX = 0.035
+_CMS_TEXT_FRACX = {
+    0: _CMS_TEXT_RELPOSX,
+    1: _CMS_TEXT_RELPOSX,
+    2: 0.5,
+    3: 1 - _CMS_TEXT_RELPOSX,
+}
+
+_cms_latex = None  # TLatex used by CMS_lumi to draw the texts
+_cms_latex_state = {}  # Text font, alignment and size currently set in _cms_latex
+_cms_logo = None  # TASImage with the CMS logo (once read correctly), drawn by CMS_lumi when drawLogo is set
 
 def CMS_lumi(pad, iPosX=11, scaleLumi=None):
 
@@ -559,7 +651,6 @@ def CMS_lumi(pad, iPosX=11, scaleLumi=None):
         iPosX (int, optional): The position of the CMS logo. Defaults to 11 (top-left, left-aligned).
         scaleLumi (float, optional): Scale factor for the luminosity text size.
     """
-    relPosX = 0.035
     relPosY = 0.035
     relExtraDY = 1.2
     outOfFrame = int(iPosX / 10) == 0
@@ -572,26 +663,47 @@ def CMS_lumi(pad, iPosX=11, scaleLumi=None):
     t = pad.GetTopMargin()
     r = pad.GetRightMargin()
     b = pad.GetBottomMargin()
+    one_m_lr = 1 - l - r  # Frame width and height in NDC
+    one_m_tb = 1 - t - b
     outOfFrame_posY = 1 - t + lumiTextOffset * t
     pad.cd()
-    lumiText = ""
-    lumiText += cms_lumi
-    if cms_energy != "":
-        lumiText += " (" + cms_energy + ")"
+    lumiText = f"{cms_lumi} ({cms_energy})" if cms_energy != "" else cms_lumi
     if scaleLumi:
         lumiText = ScaleText(lumiText, scale=scaleLumi)
 
+    # The text attributes are only changed in the TLatex when they differ from
+    # the ones already set (possibly in a previous call), to avoid unneeded
+    # calls to ROOT.
+    textState = _cms_latex_state
+
+    def setTextStyle(font, align, size):
+        if textState.get('font') != font:
+            latex.SetTextFont(font)
+            textState['font'] = font
+        if textState.get('align') != align:
+            latex.SetTextAlign(align)
+            textState['align'] = align
+        if textState.get('size') != size:
+            latex.SetTextSize(size)
+            textState['size'] = size
+
     def drawText(text, posX, posY, font, align, size):
-        latex.SetTextFont(font)
-        latex.SetTextAlign(align)
-        latex.SetTextSize(size)
+        setTextStyle(font, align, size)
         latex.DrawLatex(posX, posY, text)
 
-    latex = rt.TLatex()
-    latex.SetNDC()
-    latex.SetTextAngle(0)
-    latex.SetTextColor(rt.kBlack)
+    # The TLatex is only used as a template for DrawLatex, so it is created once.
+    global _cms_latex
+    if _cms_latex is None:
+        _cms_latex = rt.TLatex()
+        _cms_latex.SetNDC()
+        _cms_latex.SetTextAngle(0)
+        _cms_latex.SetTextColor(rt.kBlack)
+        _cms_latex_state.clear()
+    latex = _cms_latex
     extraTextSize = extraOverCmsTextSize * cmsTextSize
+    # Text sizes in units of the pad height (used several times below)
+    cmsTextSize_t = cmsTextSize * t
+    extraTextSize_t = extraTextSize * t
     drawText(
         text=lumiText,
         posX=1 - r,
@@ -607,25 +719,27 @@ def CMS_lumi(pad, iPosX=11, scaleLumi=None):
             posY=outOfFrame_posY,
             font=cmsTextFont,
             align=11,
-            size=cmsTextSize * t,
+            size=cmsTextSize_t,
         )
-    posX_ = 0
-    if iPosX % 10 <= 1:
-        posX_ = l + relPosX * (1 - l - r)
-    elif iPosX % 10 == 2:
-        posX_ = l + 0.5 * (1 - l - r)
-    elif iPosX % 10 == 3:
-        posX_ = 1 - r - relPosX * (1 - l - r)
-    posY_ = 1 - t - relPosY * (1 - t - b)
+    fracX = _CMS_TEXT_FRACX.get(iPosX % 10)
+    posX_ = 0 if fracX is None else l + fracX * one_m_lr
+    posY_ = 1 - t - relPosY * one_m_tb
     if not outOfFrame:
         if drawLogo:
-            posX_ = l + 0.045 * (1 - l - r) * W / H
-            posY_ = 1 - t - 0.045 * (1 - t - b)
+            posX_ = l + 0.045 * one_m_lr * W / H
+            posY_ = 1 - t - 0.045 * one_m_tb
             xl_0 = posX_
             yl_0 = posY_ - 0.15
             xl_1 = posX_ + 0.15 * H / W
             yl_1 = posY_
-            CMS_logo = rt.TASImage("CMS-BW-label.png")
+            # The image is read from disk only once and then drawn in every pad
+            # (it is read again if it could not be loaded, e.g. from another
+            # working directory, as the path is relative)
+            global _cms_logo
+            CMS_logo = _cms_logo
+            if CMS_logo is None:
+                CMS_logo = rt.TASImage("CMS-BW-label.png")
+                if CMS_logo.IsValid(): _cms_logo = CMS_logo
             pad_logo = rt.TPad("logo", "logo", xl_0, yl_0, xl_1, yl_1)
             pad_logo.Draw()
             pad_logo.cd()
@@ -639,29 +753,26 @@ def CMS_lumi(pad, iPosX=11, scaleLumi=None):
                 posY=posY_,
                 font=cmsTextFont,
                 align=align_,
-                size=cmsTextSize * t,
+                size=cmsTextSize_t,
             )
             if writeExtraText:
-                posY_ -= relExtraDY * cmsTextSize * t
+                posY_ -= relExtraDY * cmsTextSize_t
                 drawText(
                     text=extraText,
                     posX=posX_,
                     posY=posY_,
                     font=extraTextFont,
                     align=align_,
-                    size=extraTextSize * t,
+                    size=extraTextSize_t,
                 )
                 if len(additionalInfo) != 0:
-                    latex.SetTextSize(extraTextSize * t)
-                    latex.SetTextFont(additionalInfoFont)
-                    for ind, tt in enumerate(additionalInfo):
-                        latex.DrawLatex(
-                            posX_,
-                            posY_
-                            - 0.004
-                            - (relExtraDY * extraTextSize * t / 2 + 0.02) * (ind + 1),
-                            tt,
-                        )
+                    setTextStyle(additionalInfoFont, align_, extraTextSize_t)
+                    # Vertical step between lines and position of the first one:
+                    stepY = relExtraDY * extraTextSize_t / 2 + 0.02
+                    posY_info = posY_ - 0.004 - stepY
+                    for tt in additionalInfo:
+                        latex.DrawLatex(posX_, posY_info, tt)
+                        posY_info -= stepY
     elif writeExtraText:
         if outOfFrame:
             scale = float(H) / W if W > H else 1
@@ -673,7 +784,7 @@ def CMS_lumi(pad, iPosX=11, scaleLumi=None):
             posY=posY_,
             font=extraTextFont,
             align=align_,
-            size=extraTextSize * t,
+            size=extraTextSize_t,
         )
     UpdatePad(pad)
 
@@ -687,6 +798,21 @@ def CMS_lumi(pad, iPosX=11, scaleLumi=None):
 # ##        ########  #######     ##       ##    #### ##    ##  ######         ##     ## ##     ##  ######  ##     ##  #######   ######
 
 
+def _canvasGeometry(W, H):
+    """Returns the size and margins of a cmsCanvas of W x H pixels.
+
+    Returns:
+        tuple: (W, H, left, right, right with z axis, top, bottom), with the margins as fractions of the canvas size.
+    """
+    T = 0.07 * H
+    B = 0.11 * H
+    L = 0.13 * H
+    R = 0.03 * H
+    return (W, H, L / W, R / W, B / W + 0.03, T / H, B / H + 0.02)
+
+# Geometry of square (True) and rectangular (False) canvases, computed only once.
+_CANVAS_GEOMETRY = {True: _canvasGeometry(600, 600), False: _canvasGeometry(800, 600)}
+
 # Create canvas with predefined axix and CMS logo
 def cmsCanvas(
     canvName,
@@ -729,27 +855,17 @@ def cmsCanvas(
     if cmsStyle is None: setCMSStyle()
 
     # Set canvas dimensions and margins
-    W_ref = 600 if square else 800
-    H_ref = 600 if square else 600
-
-    W = W_ref
-    H = H_ref
-    T = 0.07 * H_ref
-    B = 0.11 * H_ref
-    L = 0.13 * H_ref
-    R = 0.03 * H_ref
+    W, H, left, right, right_z, top, bottom = _CANVAS_GEOMETRY[bool(square)]
 
     canv = rt.TCanvas(canvName, canvName, 50, 50, W, H)
     canv.SetFillColor(0)
     canv.SetBorderMode(0)
     canv.SetFrameFillStyle(0)
     canv.SetFrameBorderMode(0)
-    canv.SetLeftMargin(L / W + extraSpace)
-    canv.SetRightMargin(R / W)
-    if with_z_axis:
-        canv.SetRightMargin(B / W + 0.03)
-    canv.SetTopMargin(T / H)
-    canv.SetBottomMargin(B / H + 0.02)
+    canv.SetLeftMargin(left + extraSpace)
+    canv.SetRightMargin(right_z if with_z_axis else right)
+    canv.SetTopMargin(top)
+    canv.SetBottomMargin(bottom)
 
     # Draw frame and set axis labels
     h = canv.DrawFrame(x_min, y_min, x_max, y_max)
@@ -765,9 +881,8 @@ def cmsCanvas(
     h.GetYaxis().SetTitle(nameYaxis)
     h.Draw("AXIS")
 
-    # Draw CMS logo and update canvas
+    # Draw CMS logo and update canvas (CMS_lumi already updates the pad)
     CMS_lumi(canv, iPos, scaleLumi=scaleLumi)
-    UpdatePad(canv)
     canv.RedrawAxis()
     canv.GetFrame().Draw()
     return canv
@@ -797,8 +912,9 @@ def cmsCanvasResetAxes(canv, x_min, x_max, y_min, y_max):
         y_min (float): The minimum value of the y-axis.
         y_max (float): The maximum value of the y-axis.
     """
-    GetcmsCanvasHist(canv).GetXaxis().SetRangeUser(x_min, x_max)
-    GetcmsCanvasHist(canv).GetYaxis().SetRangeUser(y_min, y_max)
+    hframe = GetcmsCanvasHist(canv)
+    hframe.GetXaxis().SetRangeUser(x_min, x_max)
+    hframe.GetYaxis().SetRangeUser(y_min, y_max)
 
 
 def cmsDiCanvas(
@@ -874,14 +990,14 @@ def cmsDiCanvas(
     canv.SetFrameLineWidth(0)
     canv.Divide(1, 2)
 
-    canv.cd(1)
-    rt.gPad.SetPad(0, Hdw / H, 1, 1)
-    rt.gPad.SetLeftMargin(L)
-    rt.gPad.SetRightMargin(R)
-    rt.gPad.SetTopMargin(Tup)
-    rt.gPad.SetBottomMargin(Bup)
+    padup = canv.cd(1)
+    padup.SetPad(0, Hdw / H, 1, 1)
+    padup.SetLeftMargin(L)
+    padup.SetRightMargin(R)
+    padup.SetTopMargin(Tup)
+    padup.SetBottomMargin(Bup)
 
-    hup = canv.cd(1).DrawFrame(x_min, y_min, x_max, y_max)
+    hup = padup.DrawFrame(x_min, y_min, x_max, y_max)
     hup.GetYaxis().SetTitleOffset(extraSpace + (1.1 if square else 0.9) * Hup / H_ref)
     hup.GetXaxis().SetTitleOffset(999)
     hup.GetXaxis().SetLabelOffset(999)
@@ -889,43 +1005,46 @@ def cmsDiCanvas(
     hup.SetLabelSize(hup.GetLabelSize("Y") * H_ref / Hup, "Y")
     hup.GetYaxis().SetTitle(nameYaxis)
 
-    CMS_lumi(rt.gPad, iPos, scaleLumi=scaleLumi)
+    CMS_lumi(padup, iPos, scaleLumi=scaleLumi)
 
-    canv.cd(2)
-    rt.gPad.SetPad(0, 0, 1, Hdw / H)
-    rt.gPad.SetLeftMargin(L)
-    rt.gPad.SetRightMargin(R)
-    rt.gPad.SetTopMargin(Tdw)
-    rt.gPad.SetBottomMargin(Bdw)
+    paddw = canv.cd(2)
+    paddw.SetPad(0, 0, 1, Hdw / H)
+    paddw.SetLeftMargin(L)
+    paddw.SetRightMargin(R)
+    paddw.SetTopMargin(Tdw)
+    paddw.SetBottomMargin(Bdw)
 
-    hdw = canv.cd(2).DrawFrame(x_min, r_min, x_max, r_max)
+    hdw = paddw.DrawFrame(x_min, r_min, x_max, r_max)
+    xaxis = hdw.GetXaxis()
+    yaxis = hdw.GetYaxis()
+    scale = H_ref / Hdw
     # Scale text sizes and margins to match normal size
-    hdw.GetYaxis().SetTitleOffset(extraSpace + (1.0 if square else 0.8) * Hdw / H_ref)
-    hdw.GetXaxis().SetTitleOffset(0.9)
-    hdw.SetTitleSize(hdw.GetTitleSize("Y") * H_ref / Hdw, "Y")
-    hdw.SetLabelSize(hdw.GetLabelSize("Y") * H_ref / Hdw, "Y")
-    hdw.SetTitleSize(hdw.GetTitleSize("X") * H_ref / Hdw, "X")
-    hdw.SetLabelSize(hdw.GetLabelSize("X") * H_ref / Hdw, "X")
-    hdw.SetLabelOffset(hdw.GetLabelOffset("X") * H_ref / Hdw, "X")
-    hdw.GetXaxis().SetTitle(nameXaxis)
-    hdw.GetYaxis().SetTitle(nameRatio)
+    yaxis.SetTitleOffset(extraSpace + (1.0 if square else 0.8) / scale)
+    xaxis.SetTitleOffset(0.9)
+    hdw.SetTitleSize(yaxis.GetTitleSize() * scale, "Y")
+    hdw.SetLabelSize(yaxis.GetLabelSize() * scale, "Y")
+    hdw.SetTitleSize(xaxis.GetTitleSize() * scale, "X")
+    hdw.SetLabelSize(xaxis.GetLabelSize() * scale, "X")
+    hdw.SetLabelOffset(xaxis.GetLabelOffset() * scale, "X")
+    xaxis.SetTitle(nameXaxis)
+    yaxis.SetTitle(nameRatio)
 
     # Set tick lengths to match original (these are fractions of axis length)
-    hdw.SetTickLength(hdw.GetTickLength("Y") * H_ref / Hup, "Y")  # ?? ok if 1/3
-    hdw.SetTickLength(hdw.GetTickLength("X") * H_ref / Hdw, "X")
+    hdw.SetTickLength(yaxis.GetTickLength() * H_ref / Hup, "Y")  # ?? ok if 1/3
+    hdw.SetTickLength(xaxis.GetTickLength() * scale, "X")
 
     # Reduce divisions to match smaller height (default n=510, optim=kTRUE)
-    hdw.GetYaxis().SetNdivisions(505)
+    yaxis.SetNdivisions(505)
     hdw.Draw("AXIS")
-    canv.cd(1)
-    UpdatePad(canv.cd(1))
-    canv.cd(1).RedrawAxis()
-    canv.cd(1).GetFrame().Draw()
+    canv.cd(1)  # The upper pad is left as the current one
+    UpdatePad(padup)
+    padup.RedrawAxis()
+    padup.GetFrame().Draw()
     return canv
 
 
 def cmsLeg(
-    x1, y1, x2, y2, textSize=0.04, textFont=42, textColor=rt.kBlack, columns=None
+    x1, y1, x2, y2, textSize=0.04, textFont=42, textColor=1, columns=None  # textColor: kBlack
 ):
     """
     Create a legend with CMS style.
@@ -961,7 +1080,7 @@ def cmsHeader(
     textAlign=12,
     textSize=0.04,
     textFont=42,
-    textColor=rt.kBlack,
+    textColor=1,  # kBlack
     isToRemove=True,
 ):
     """
@@ -981,12 +1100,13 @@ def cmsHeader(
     header.SetTextSize(textSize)
     header.SetTextAlign(textAlign)
     header.SetTextColor(textColor)
+    prims = leg.GetListOfPrimitives()
     if isToRemove:
-        leg.SetHeader(legTitle, "C")
-        leg.GetListOfPrimitives().Remove(leg.GetListOfPrimitives().At(0))
-        leg.GetListOfPrimitives().AddAt(header, 0)
+        leg.SetHeader(legTitle, "C")  # The header entry is always the first one
+        prims.Remove(prims.First())
+        prims.AddFirst(header)
     else:
-        leg.GetListOfPrimitives().AddLast(header)
+        prims.AddLast(header)
 
 
 # ########  ########     ###    ##      ##
@@ -998,17 +1118,32 @@ def cmsHeader(
 # ########  ##     ## ##     ##  ###  ###
 
 
+def _sameOption(opt):
+    """
+    Prefix a drawing option with "SAME" unless it already includes it.
+
+    ROOT options are case insensitive and only the first "SAME" is removed when
+    parsing them, so the prefix must not be added a second time.
+
+    Args:
+        opt (str): The drawing option.
+
+    Returns:
+        str: The drawing option to be used.
+    """
+    return opt if 'SAME' in opt.upper() else 'SAME'+opt
+
 def cmsDraw(
     h,
     style,
-    marker=rt.kFullCircle,
+    marker=20,  # kFullCircle
     msize=1.0,
-    mcolor=rt.kBlack,
-    lstyle=rt.kSolid,
+    mcolor=1,  # kBlack
+    lstyle=1,  # kSolid
     lwidth=1,
     lcolor=-1,
     fstyle=1001,
-    fcolor=rt.kYellow + 1,
+    fcolor=401,  # kYellow+1
     alpha=-1,
 ):
     """
@@ -1034,20 +1169,18 @@ def cmsDraw(
     h.SetLineWidth(lwidth)
     h.SetLineColor(mcolor if lcolor == -1 else lcolor)
     h.SetFillStyle(fstyle)
-    h.SetFillColor(fcolor)
     if alpha > 0:
-        h.SetFillColorAlpha(fcolor, alpha)
+        h.SetFillColorAlpha(fcolor, alpha)  # It also sets the fill colour
+    else:
+        h.SetFillColor(fcolor)
 
     # We expect this command to be used with an alreasdy-defined canvas.
-    prefix='SAME'
-    if ('SAME' in style): prefix=''
-
-    h.Draw(prefix + style)
+    h.Draw(_sameOption(style))
     # This change (by O. Gonzalez) is to put the "SAME" at the beginning so
     # style may override it if needed. It also allows to use "SAMES" just by
     # starting the style with a single S.
 
-def cmsDrawLine(line, lcolor=rt.kRed, lstyle=rt.kSolid, lwidth=2):
+def cmsDrawLine(line, lcolor=632, lstyle=1, lwidth=2):  # kRed, kSolid
     """
     Draw a line with CMS style.
 
@@ -1082,13 +1215,25 @@ def cmsObjectDraw (obj,opt='',**kwargs):
         **kwargs (ROOT styling object, optional): Parameter names correspond to object styling method and arguments correspond to stilying ROOT objects: e.g. `SetLineColor=ROOT.kRed`. A method starting with "Set" may omite the "Set" part: i.e. `LineColor=ROOT.kRed`.
     """
 
-    setRootObjectProperties(obj,**kwargs)
+    if kwargs: setRootObjectProperties(obj,**kwargs)
 
-    prefix='SAME'
-    if ('SAME' in opt): prefix=''
-    obj.Draw(prefix+opt)
+    obj.Draw(_sameOption(opt))
 
 # # # #
+# NDC coordinates (x1, y1, x2, y2) of the statistics box for each predefined
+# position of changeStatsBox, given the pad margins, the sizes of the frame
+# and the corrections for the text size and number of lines.
+_STATSBOX_POSITIONS = {
+    'tr': lambda l, r, b, t, xsize, ysize, textsize, yfactor: (
+        1-r-xsize*0.33-textsize, 1-t-ysize*yfactor-textsize, 1-r-xsize*0.03, 1-t-ysize*0.03),
+    'tl': lambda l, r, b, t, xsize, ysize, textsize, yfactor: (
+        l+xsize*0.03, 1-t-ysize*yfactor-textsize, l+xsize*0.33+textsize, 1-t-ysize*0.03),
+    'bl': lambda l, r, b, t, xsize, ysize, textsize, yfactor: (
+        l+xsize*0.03, b+ysize*0.03, l+xsize*0.33+textsize, b+ysize*yfactor+textsize),
+    'br': lambda l, r, b, t, xsize, ysize, textsize, yfactor: (
+        1-r-xsize*0.33-textsize, b+ysize*0.03, 1-r-xsize*0.03, b+ysize*yfactor+textsize),
+}
+
 def changeStatsBox (canv,ipos_x1=None,y1pos=None,x2pos=None,y2pos=None,**kwargs):
     """This method allows to obtain the StatsBox from the given Canvas and modify
     its position and, additionally, modify its properties using named keywords
@@ -1124,50 +1269,55 @@ def changeStatsBox (canv,ipos_x1=None,y1pos=None,x2pos=None,y2pos=None,**kwargs)
         **kwargs: Arbitrary keyword arguments for mofifying the properties of the stats box using Set methods or similar.
     """
 
-    canv.Update()  # To be sure we have created the statistic box
     stbox = canv.GetPrimitive('stats')
+    if not stbox:  # To be sure we have created the statistic box
+        canv.Update()
+        stbox = canv.GetPrimitive('stats')
 
     if (stbox.Class().GetName()!='TPaveStats'):
         raise ReferenceError("ERROR: Trying to change the StatsBox when it has not been enabled... activate it with SetOptStat (and use \"SAMES\" or equivalent)")
 
     setRootObjectProperties(stbox,**kwargs)
-    canv.Update()
 
     # We may change the position... first chosing how:
     if isinstance(ipos_x1,str):
         a = ipos_x1.lower()
-        x = None
-        # The size may be modified depending on the text size. Note that the text
-        # size is 0, it is adapted to the box size (I think)
-        textsize = 0 if (stbox.GetTextSize()==0) else 6*(stbox.GetTextSize()-0.025)
-        xsize = (1-canv.GetRightMargin()-canv.GetLeftMargin())*(1 if y1pos is None else y1pos)  # Note these parameters looses their "x"-"y" nature.
-        ysize = (1-canv.GetBottomMargin()-canv.GetTopMargin())*(1 if x2pos is None else x2pos)
-
-        yfactor = 0.05+0.05*stbox.GetListOfLines().GetEntries()
-
-        if (a=='tr'):
-            x = {'SetX1NDC':1-canv.GetRightMargin()-xsize*0.33-textsize,'SetY1NDC':1-canv.GetTopMargin()-ysize*yfactor-textsize,'SetX2NDC':1-canv.GetRightMargin()-xsize*0.03,'SetY2NDC':1-canv.GetTopMargin()-ysize*0.03}
-        elif (a=='tl'):
-            x = {'SetX1NDC':canv.GetLeftMargin()+xsize*0.03,'SetY1NDC':1-canv.GetTopMargin()-ysize*yfactor-textsize,'SetX2NDC':canv.GetLeftMargin()+xsize*0.33+textsize,'SetY2NDC':1-canv.GetTopMargin()-ysize*0.03}
-        elif (a=='bl'):
-            x = {'SetX1NDC':canv.GetLeftMargin()+xsize*0.03,'SetY1NDC':canv.GetBottomMargin()+ysize*0.03,'SetX2NDC':canv.GetLeftMargin()+xsize*0.33+textsize,'SetY2NDC':canv.GetBottomMargin()+ysize*yfactor+textsize}
-        elif (a=='br'):
-            x = { 'SetX1NDC':1-canv.GetRightMargin()-xsize*0.33-textsize,'SetY1NDC':canv.GetBottomMargin()+ysize*0.03,'SetX2NDC':1-canv.GetRightMargin()-xsize*0.03,'SetY2NDC':canv.GetBottomMargin()+ysize*yfactor+textsize}
-
-        if x is None:
+
+        if a not in _STATSBOX_POSITIONS:
             print("ERROR: Invalid code provided to position the statistics box: {ipos_x1}".format(ipos_x1=ipos_x1))
         else:
-            for xkey,xval in x.items():
-                getattr(stbox,xkey)(xval)
+            # The box must be up to date (e.g. number of lines) to compute the position.
+            canv.Update()
+
+            # The size may be modified depending on the text size. Note that the text
+            # size is 0, it is adapted to the box size (I think)
+            textsize = 0 if (stbox.GetTextSize()==0) else 6*(stbox.GetTextSize()-0.025)
+
+            lmargin, rmargin = canv.GetLeftMargin(), canv.GetRightMargin()
+            bmargin, tmargin = canv.GetBottomMargin(), canv.GetTopMargin()
+            xsize = (1-rmargin-lmargin)*(1 if y1pos is None else y1pos)  # Note these parameters looses their "x"-"y" nature.
+            ysize = (1-bmargin-tmargin)*(1 if x2pos is None else x2pos)
+
+            yfactor = 0.05+0.05*stbox.GetListOfLines().GetEntries()
+
+            x1, y1, x2, y2 = _STATSBOX_POSITIONS[a](lmargin, rmargin, bmargin, tmargin,
+                                                    xsize, ysize, textsize, yfactor)
+            stbox.SetX1NDC(x1)
+            stbox.SetY1NDC(y1)
+            stbox.SetX2NDC(x2)
+            stbox.SetY2NDC(y2)
 
     else: # We change the values that are not None
-        for xkey,xval in {'ipos_x1':'SetX1NDC','y1pos':'SetY1NDC','x2pos':'SetX2NDC','y2pos':'SetY2NDC'}.items():
-            x = locals()[xkey]
-            if x is not None: getattr(stbox,xval)(x)
+        if ipos_x1 is not None: stbox.SetX1NDC(ipos_x1)
+        if y1pos is not None: stbox.SetY1NDC(y1pos)
+        if x2pos is not None: stbox.SetX2NDC(x2pos)
+        if y2pos is not None: stbox.SetY2NDC(y2pos)
 
     UpdatePad(canv)   # To update the TCanvas or TPad.
 
 # # # #
+_METHOD_CACHE = {}  # Method name used by setRootObjectProperties for each (class, argument)
+
 def setRootObjectProperties (obj,**kwargs):
     """This method allows to modify the properties of a ROOT object using a list of
     named keyword arguments to call the associated methods.
@@ -1186,22 +1336,32 @@ def setRootObjectProperties (obj,**kwargs):
         **kwargs: Arbitrary keyword arguments for mofifying the properties of the object using Set methods or similar.
     """
 
+    objtype = type(obj)
+
     for xkey,xval in kwargs.items():
-        if hasattr(obj,'Set'+xkey):   # Note!
-            method = 'Set'+xkey
-        elif hasattr(obj,xkey):
-            method = xkey
-        else:
-            print("Indicated argument for configuration is invalid: {} {} {}".format(xkey, xval, type(obj)))
-            raise AttributeError("Invalid argument")
+        # The name of the method is resolved only once for each class and argument.
+        method = _METHOD_CACHE.get((objtype,xkey))
+
+        if method is None:
+            if hasattr(obj,'Set'+xkey):   # Note!
+                method = 'Set'+xkey
+            elif hasattr(obj,xkey):
+                method = xkey
+            else:
+                print("Indicated argument for configuration is invalid: {} {} {}".format(xkey, xval, type(obj)))
+                raise AttributeError("Invalid argument")
+
+            _METHOD_CACHE[(objtype,xkey)] = method
 
         if xval is None:
             getattr(obj,method)()
-        elif xval is tuple:
+        elif isinstance(xval,tuple):
             getattr(obj,method)(*xval)
         else:
             getattr(obj,method)(xval)
 
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
 def is_valid_hex_color(hex_color):
     """
     Check if a string represents a valid hexadecimal color code.
@@ -1212,11 +1372,42 @@ def is_valid_hex_color(hex_color):
     Returns:
         bool: True if the string is a valid hexadecimal color code, False otherwise.
     """
-    hex_color_pattern = re.compile(r'^#(?:[0-9a-fA-F]{3}){1,2}$')
-
-    return bool(hex_color_pattern.match(hex_color))
+    if not isinstance(hex_color, str): return False
+    if len(hex_color) not in (4, 7) or hex_color[0] != '#': return False
+    return _HEX_DIGITS.issuperset(hex_color[1:])
 
 # # # #
+def _pick_palette(n):
+    """
+    Get the smallest of the default (Petroff) palettes with at least n colours, or the largest one if none is big enough.
+
+    Args:
+        n (int): The number of colours needed.
+
+    Returns:
+        list: The hexadecimal color codes of the palette.
+    """
+    if n <= len(petroff_6): return petroff_6
+    if n <= len(petroff_8): return petroff_8
+    return petroff_10
+
+_COLOR_CACHE = {}  # ROOT colour index for each hexadecimal colour code already used
+
+def _get_color(hex_color):
+    """
+    Get the ROOT colour index for a hexadecimal colour code, caching the result.
+
+    Args:
+        hex_color (str): The hexadecimal color code.
+
+    Returns:
+        int: The ROOT colour index.
+    """
+    color = _COLOR_CACHE.get(hex_color)
+    if color is None:
+        color = _COLOR_CACHE[hex_color] = rt.TColor.GetColor(hex_color)
+    return color
+
 def cmsDrawStack(stack, legend, MC, data = None, palette = None, invertLegendEntries = True):
     """
     Draw a stack of histograms on a pre-defined stack plot and optionally a data histogram, with a pre-defined legend, using a user-defined or default list (palette) of hex colors.
@@ -1229,40 +1420,40 @@ def cmsDrawStack(stack, legend, MC, data = None, palette = None, invertLegendEnt
         palette (list, optional): A list of hexadecimal color codes to use for the histograms. If not provided, a default palette will be used.
         invertLegendEntries (bool, optional): Whether to add the legend entries in reverse order. Defaults to True.
     """
-    is_user_palette_valid = False
+    n_mc = len(MC)
 
-    if palette != None:
-        is_user_palette_valid = all(is_valid_hex_color(color) for color in palette)
-        if is_user_palette_valid:
-            palette_ = palette
-            if len(MC.keys()) > len(palette_):
-                print("Length of provided palette is smaller than the number of histograms to be drawn, wrap around is enabled")
-        else:
+    if palette is not None and all(map(is_valid_hex_color, palette)):
+        palette_ = palette
+        if n_mc > len(palette_):
+            print("Length of provided palette is smaller than the number of histograms to be drawn, wrap around is enabled")
+    else:
+        if palette is not None:
             print("Invalid palette elements provided, default palette will be used")
 
-    if palette == None or is_user_palette_valid == False:
-        if len(MC.keys()) < 7:
-            palette_ = petroff_6
-        elif len(MC.keys()) < 9:
-            palette_ = petroff_8
-        else:
-            palette_ = petroff_10
-            if len(MC.keys()) > len(palette_):
-                print("Length of largest default palette is smaller than the number of histograms to be drawn, wrap around is enabled")
-
-    # Add legend entries in inverse order
-    if invertLegendEntries:
-        for n, item in reversed(list(enumerate(MC.items()))):
-            legend.AddEntry(item[1], item[0], "f")
-    for n, item in enumerate(MC.items()):
-        item[1].SetLineColor(rt.TColor.GetColor(palette_[n%len(palette_)]))
-        item[1].SetFillColor(rt.TColor.GetColor(palette_[n%len(palette_)]))
-        stack.Add(item[1])
-        if not invertLegendEntries:
-            legend.AddEntry(item[1], item[0], "f")
-        stack.Draw("HIST SAME")
-
-    if data != None:
+        palette_ = _pick_palette(n_mc)
+        if n_mc > len(palette_):
+            print("Length of largest default palette is smaller than the number of histograms to be drawn, wrap around is enabled")
+
+    mc_items = list(MC.items())
+
+    # ROOT colours for the palette entries actually used (so no unneeded
+    # colours are created in ROOT)
+    colors = [_get_color(color) for color in palette_[:n_mc]]
+    ncolors = len(colors)
+
+    for n, (name, hist) in enumerate(mc_items):
+        color = colors[n%ncolors]
+        hist.SetLineColor(color)
+        hist.SetFillColor(color)
+        stack.Add(hist)
+
+    # Add legend entries (in inverse order if requested)
+    for name, hist in (reversed(mc_items) if invertLegendEntries else mc_items):
+        legend.AddEntry(hist, name, "f")
+
+    stack.Draw("HIST SAME")  # Drawn once all the histograms have been added
+
+    if data is not None:
         cmsDraw(data, "P", mcolor=rt.kBlack)
         legend.AddEntry(data, "Data", "lp")
 
@@ -1278,7 +1469,7 @@ def ScaleText(name, scale=0.75):
     Returns:
         str: The scaled text string.
     """
-    return "#scale[" + str(scale) + "]{" + str(name) + "}"
+    return f"#scale[{scale}]{{{name}}}"
 
 # # # #
 def cmsReturnMaxY (*args):
@@ -1302,22 +1493,20 @@ def cmsReturnMaxY (*args):
             if (maxval<value): maxval = value
 
         elif hasattr(xobj,'GetErrorYhigh'):  # TGraph are special as GetMaximum exists but it is a bug value.
-            value = 0
-
-            i = xobj.GetN()
+            n = xobj.GetN()
             y = xobj.GetY()
-            ey = xobj.GetEY()
-
-            while (i>0):
-                i -= 1  # Fortrans convention -> C convention
-
-                ivalue = y[i]
-                try:
-                    ivalue += max(ey[i],xobj.GetErrorYhigh(i))
-                except ReferenceError:
-                    pass
 
-                if (value<ivalue): value = ivalue
+            # The upper errors are read from the arrays in the graph rather
+            # than calling GetErrorYhigh for every point.
+            if xobj.InheritsFrom('TGraphAsymmErrors'):
+                ey = xobj.GetEYhigh()
+            else:
+                ey = xobj.GetEY()
+
+            try:
+                value = max((y[i]+ey[i] for i in range(n)), default=0)
+            except ReferenceError:  # No errors stored (e.g. a plain TGraph)
+                value = max((y[i] for i in range(n)), default=0)
 
             if (maxval<value): maxval = value
 
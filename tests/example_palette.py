@@ -3,6 +3,7 @@ import cmsstyle as CMS
 
 CMS.SetExtraText("Simulation")
 ROOT.gROOT.SetBatch(ROOT.kTRUE)
+ROOT.TH1.AddDirectory(False)  # Histograms are kept by the Plotter, no need to register them
 
 class Plotter:
     def __init__(self):